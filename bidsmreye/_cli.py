@@ -55,6 +55,8 @@ def cli(argv: Any = sys.argv) -> None:
         reset_database=args.reset_database,
         bids_filter_file=args.bids_filter_file,
         linear_coreg=bool(getattr(args, "linear_coreg", False)),
+        n_jobs=int(getattr(args, "n_jobs", 1)),
+        n_jobs_per_subject=int(getattr(args, "n_jobs_per_subject", 1)),
         log_level_name=log_level_name,
         force=bool(getattr(args, "force", False)),
     )
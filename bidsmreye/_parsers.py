@@ -167,6 +167,22 @@ May lead to worse results so check your outputs.
 """,
         action="store_true",
     )
+    prepare_parser.add_argument(
+        "--n_jobs",
+        help="""
+Number of subjects to process in parallel.
+""",
+        type=int,
+        default=1,
+    )
+    prepare_parser.add_argument(
+        "--n_jobs_per_subject",
+        help="""
+Number of images of a subject to coregister in parallel.
+""",
+        type=int,
+        default=1,
+    )
 
     generalize_parser = subparsers.add_parser(
         "generalize",
@@ -202,6 +218,22 @@ May lead to worse results so check your outputs.
 """,
         action="store_true",
     )
+    all_parser.add_argument(
+        "--n_jobs",
+        help="""
+Number of subjects to process in parallel.
+""",
+        type=int,
+        default=1,
+    )
+    all_parser.add_argument(
+        "--n_jobs_per_subject",
+        help="""
+Number of images of a subject to coregister in parallel.
+""",
+        type=int,
+        default=1,
+    )
     # TODO make it possible to pass path to a model ?
     all_parser.add_argument(
         "--model",
@@ -5,8 +5,9 @@ import re
 from pathlib import Path
 from typing import Any
 
+import nibabel as nib
 from bids import BIDSLayout  # type: ignore
-from bids.layout import BIDSFile
+from bids.layout import BIDSFile, BIDSLayoutIndexer
 
 from bidsmreye._version import __version__
 from bidsmreye.configuration import (
@@ -175,17 +176,77 @@ def create_sidecar(
     log.debug(f"Sidecar saved to {sidecar_name}")
 
 
+def get_repetition_time(img: str | Path) -> float | None:
+    """Get the repetition time in seconds from the header of a 4D image.
+
+    Only the header is read: the data array of the image is never accessed.
+
+    :param img: Path to the image.
+    :type img: str | Path
+
+    :return: Repetition time in seconds or None if the image is not 4D.
+    :rtype: float | None
+    """
+    header = nib.load(img, mmap=True).header
+    zooms = header.get_zooms()
+    if len(zooms) < 4:
+        return None
+    repetition_time = float(zooms[3])
+    time_unit = header.get_xyzt_units()[1]
+    if time_unit == "msec":
+        repetition_time /= 1000
+    elif time_unit == "usec":
+        repetition_time /= 1_000_000
+    return repetition_time
+
+
 def save_sampling_frequency_to_json(
-    layout_out: BIDSLayout, img: BIDSFile, source: str
+    layout_out: BIDSLayout,
+    img: BIDSFile,
+    source: str,
+    header_repetition_time: float | None = None,
 ) -> None:
-    metadata = img.get_metadata()
-    repetition_time = metadata["RepetitionTime"]
-    # TODO handle rare edge case where preprocessed data
-    # does not contain RepetitionTime metadata
+    """Save the sampling frequency of the eye motion timeseries of an image.
+
+    The repetition time comes from the RepetitionTime metadata of the image.
+    The image header is only used if this metadata is missing.
+
+    :param layout_out: Layout output dataset.
+    :type layout_out: BIDSLayout
+
+    :param img: Functional image.
+    :type img: BIDSFile
+
+    :param source: Path of the image relative to the input dataset.
+    :type source: str
+
+    :param header_repetition_time: Repetition time already read from the image header.
+                                   Defaults to None.
+    :type header_repetition_time: float, optional
+
+    :raises ValueError: If the repetition time is not strictly positive.
+    """
+    repetition_time = img.get_metadata().get("RepetitionTime")
+    if repetition_time is None:
+        if header_repetition_time is None:
+            header_repetition_time = get_repetition_time(img.path)
+        log.warning(
+            f"No RepetitionTime found in the metadata of:\n\t{img.path}\n"
+            f"Using the value from the image header: {header_repetition_time}."
+        )
+        repetition_time = header_repetition_time
+
+    if repetition_time is None or float(repetition_time) <= 0:
+        raise ValueError(
+            f"Invalid repetition time ({repetition_time}) for:\n\t{img.path}\n"
+            "Make sure the sidecar JSON of this image has a 'RepetitionTime'."
+        )
+
+    repetition_time = float(repetition_time)
     if repetition_time <= 1:
         log.warning(f"Found a repetition time of {repetition_time} seconds.")
     create_sidecar(
-        layout_out, img.path, SamplingFrequency=1 / float(repetition_time), source=source
+        layout_out, img.path, SamplingFrequency=1 / repetition_time, source=source
     )
 
 
@@ -206,6 +267,9 @@ def get_dataset_layout(
     :param use_database: Defaults to False
     :type use_database: bool, optional
 
+    :param reset_database: Defaults to False
+    :type reset_database: bool, optional
+
     :return: _description_
     :rtype: BIDSLayout
     """
@@ -221,9 +285,16 @@ def get_dataset_layout(
 
     log.info(f"Indexing {dataset_path}")
 
+    # metadata from sidecar files are not needed to select files
+    indexer = BIDSLayoutIndexer(validate=False, index_metadata=False)
+
     if not use_database:
         return BIDSLayout(
-            dataset_path, validate=False, derivatives=False, config=pybids_config
+            dataset_path,
+            validate=False,
+            derivatives=False,
+            config=pybids_config,
+            indexer=indexer,
         )
 
     database_path = dataset_path / "pybids_db"
@@ -234,6 +305,7 @@ def get_dataset_layout(
         config=pybids_config,
         database_path=database_path,
         reset_database=reset_database,
+        indexer=indexer,
     )
 
 
@@ -31,6 +31,7 @@ def bidsmreye(
     linear_coreg: bool = False,
     log_level_name: str | None = None,
     force: bool = False,
+    **parallel_options: int,
 ) -> None:
     bids_filter = None
     if bids_filter_file is not None and Path(bids_filter_file).is_file():
@@ -53,6 +54,8 @@ def bidsmreye(
         bids_filter=bids_filter,
         linear_coreg=linear_coreg,
         force=force,
+        # n_jobs and n_jobs_per_subject
+        **parallel_options,
     )  # type: ignore
 
     if log_level_name is None:
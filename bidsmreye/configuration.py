@@ -3,11 +3,13 @@ from __future__ import annotations
 import json
 import os
 import warnings
+from functools import cached_property
 from pathlib import Path
 from typing import Any
 
-from attrs import asdict, converters, define, field
+from attrs import asdict, converters, define, field, validators
 from bids import BIDSLayout  # type: ignore
+from bids.layout import BIDSLayoutIndexer
 
 from bidsmreye.logger import bidsmreye_log
 
@@ -53,6 +55,8 @@ No dataset_description.json found:
     debug: str | bool | None = field(kw_only=True, default=None)
     reset_database: bool = field(kw_only=True, default=False)
     linear_coreg: bool = field(kw_only=True, default=False)
+    n_jobs: int = field(kw_only=True, default=1, validator=validators.ge(1))
+    n_jobs_per_subject: int = field(kw_only=True, default=1, validator=validators.ge(1))
     force: bool = field(kw_only=True, default=False)
 
     has_GPU: bool = False
@@ -77,16 +81,7 @@ No dataset_description.json found:
         if not self.output_dir.exists():
             self.output_dir.mkdir(parents=True, exist_ok=True)
 
-        database_path = self.input_dir / "pybids_db"
-
-        layout_in = BIDSLayout(
-            self.input_dir,
-            validate=False,
-            derivatives=False,
-            database_path=database_path,
-            reset_database=self.reset_database,
-        )
-        log.debug(f"Layout in:\n{layout_in.root}")
+        layout_in = self.layout_in
 
         value = layout_in.get(return_type="id", target="subject", datatype="func")
         if not value:
@@ -98,14 +93,36 @@ No dataset_description.json found:
                 "https://bidsmreye.readthedocs.io/en/latest/FAQ.html"
             )
 
-        if not database_path.is_dir():
-            layout_in.save(database_path)
-
         self.check_argument(attribute="subjects", layout_in=layout_in)
         self.check_argument(attribute="task", layout_in=layout_in)
         self.check_argument(attribute="space", layout_in=layout_in)
         self.check_argument(attribute="run", layout_in=layout_in)
 
+    @cached_property
+    def layout_in(self) -> BIDSLayout:
+        """Return the layout of the input dataset.
+
+        The dataset is only indexed on first access.
+        Only the metadata of bold files (for their RepetitionTime) are indexed.
+        """
+        database_path = self.input_dir / "pybids_db"
+
+        layout_in = BIDSLayout(
+            self.input_dir,
+            validate=False,
+            derivatives=False,
+            config=["bids", "derivatives"],
+            database_path=database_path,
+            reset_database=self.reset_database,
+            indexer=BIDSLayoutIndexer(validate=False, index_metadata=True, suffix="bold"),
+        )
+        log.debug(f"Layout in:\n{layout_in.root}")
+
+        if not database_path.is_dir():
+            layout_in.save(database_path)
+
+        return layout_in
+
     def check_argument(self, attribute: str, layout_in: BIDSLayout) -> Config:
         """Check an attribute value compared to the input dataset content.
 
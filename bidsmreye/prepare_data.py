@@ -2,7 +2,13 @@
 
 from __future__ import annotations
 
+import multiprocessing
+import os
 import pickle
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -15,6 +21,7 @@ from bidsmreye.bids_utils import (
     check_layout,
     create_bidsname,
     get_dataset_layout,
+    get_repetition_time,
     init_dataset,
     list_subjects,
     save_sampling_frequency_to_json,
@@ -25,6 +32,7 @@ from bidsmreye.report import generate_report
 from bidsmreye.utils import (
     check_if_file_found,
     get_deepmreye_filename,
+    literal_filter,
     move_file,
     progress_bar,
     set_this_filter,
@@ -32,13 +40,34 @@ from bidsmreye.utils import (
 
 log = bidsmreye_log(name="bidsmreye")
 
+THREAD_ENV_VARIABLES = ("OMP_NUM_THREADS", "ITK_GLOBAL_DEFAULT_NUMBER_OF_THREADS")
 
-def coregister_and_extract_data(img: str, linear_coreg: bool = False) -> None:
+
+@lru_cache(maxsize=1)
+def _cached_masks() -> tuple[Any, ...]:
+    """Load the deepMReye masks and template only once per process."""
+    return preprocess.get_masks()
+
+
+def coregister_and_extract_data(
+    img: str, linear_coreg: bool = False, masks: tuple[Any, ...] | None = None
+) -> None:
     """Coregister image to eye template and extract data from eye mask for one image.
 
     :param img: Image to coregister and extract data from
     :type img: str
+
+    :param linear_coreg: Use linear coregistration only. Defaults to False.
+    :type linear_coreg: bool, optional
+
+    :param masks: Output of ``deepmreye.preprocess.get_masks()``.
+                  Loaded if not provided. Defaults to None.
+    :type masks: tuple, optional
     """
+    log.info(f"Processing file: {Path(img).name}")
+
+    if masks is None:
+        masks = _cached_masks()
     (
         eyemask_small,
         eyemask_big,
@@ -47,7 +76,7 @@ def coregister_and_extract_data(img: str, linear_coreg: bool = False) -> None:
         x_edges,
         y_edges,
         z_edges,
-    ) = preprocess.get_masks()
+    ) = masks
 
     transforms = None if linear_coreg else ["Affine", "Affine", "SyNAggro"]
 
@@ -63,6 +92,16 @@ def coregister_and_extract_data(img: str, linear_coreg: bool = False) -> None:
     )
 
 
+def _load_deepmreye_pickle(img: str | Path) -> Any:
+    """Load the data extracted from the eye mask by deepMReye.
+
+    :param img: Path to the pickle file.
+    :type img: str | Path
+    """
+    with open(img, "rb") as f:
+        return pickle.load(f)
+
+
 def combine_data_with_empty_labels(layout_out: BIDSLayout, img: Path, i: int = 1) -> Path:
     """Combine data with empty labels.
 
@@ -81,12 +120,14 @@ def combine_data_with_empty_labels(layout_out: BIDSLayout, img: Path, i: int = 1
     log.debug(f"Combining data with empty labels: {img}")
 
     # Load data and normalize it
-    data = pickle.load(open(img, "rb"))
+    # (deepMReye saves them in single precision: this is a no-op in that case)
+    data = np.asarray(_load_deepmreye_pickle(img), dtype=np.float32)
     data = preprocess.normalize_img(data)
 
     # If experiment has no labels use dummy labels
     # 10 is the number of subTRs used in the pretrained weights, 2 is XY
-    labels = np.zeros((data.shape[3], 10, 2))
+    # (already in single precision, the type they are saved with by deepMReye)
+    labels = np.broadcast_to(np.zeros((10, 2), dtype=np.float32), (data.shape[3], 10, 2))
 
     entities = layout_out.parse_file_entities(img)
 
@@ -132,58 +173,197 @@ def process_subject(
 
     this_filter = set_this_filter(cfg, subject_label, "bold")
 
-    bf = layout_in.get(
-        regex_search=True,
-        **this_filter,
-    )
+    if (query := literal_filter(this_filter)) is not None:
+        bf = layout_in.get(**query)
+    else:
+        bf = layout_in.get(
+            regex_search=True,
+            **this_filter,
+        )
 
     check_if_file_found(bf, this_filter, layout_in)
 
-    for img in bf:
-        prepapre_image(cfg, layout_in, layout_out, img)
+    outputs = {img.path: output_filenames(layout_out, img.path) for img in bf}
+    bf = [img for img in bf if not output_exists(cfg, outputs[img.path])]
+    if not bf:
+        return
 
+    masks = _cached_masks()
 
-def prepapre_image(
-    cfg: Config, layout_in: BIDSLayout, layout_out: BIDSLayout, img: BIDSFile
-) -> None:
-    """Preprocess a single functional image."""
-    img_path = img.path
+    # Images are coregistered in parallel.
+    # Everything that relies on the layouts is done in this thread.
+    # The headers of the images without RepetitionTime in their metadata
+    # are read in the background during coregistration.
+    with (
+        ThreadPoolExecutor(max_workers=1) as prefetcher,
+        ThreadPoolExecutor(max_workers=cfg.n_jobs_per_subject) as executor,
+    ):
+        header_repetition_times = {
+            img.path: prefetcher.submit(get_repetition_time, img.path)
+            for img in bf
+            if img.get_metadata().get("RepetitionTime") is None
+        }
+
+        futures = {
+            executor.submit(
+                coregister_and_extract_data, img.path, cfg.linear_coreg, masks
+            ): img
+            for img in bf
+        }
+
+        try:
+            for future in as_completed(futures):
+                future.result()
+                img = futures[future]
+                prefetched = header_repetition_times.get(img.path)
+                collect_outputs(
+                    layout_in,
+                    layout_out,
+                    img,
+                    outputs[img.path],
+                    header_repetition_time=(
+                        None if prefetched is None else prefetched.result()
+                    ),
+                )
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            prefetcher.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def output_filenames(layout_out: BIDSLayout, img_path: str) -> dict[str, Path]:
+    """Return the names of the outputs for a functional image.
 
-    report_name = create_bidsname(layout_out, filename=img_path, filetype="report")
-    mask_name = create_bidsname(layout_out, filename=img_path, filetype="mask")
-    output_file = create_bidsname(layout_out, Path(img_path), "no_label_bold")
+    :param layout_out: Layout output dataset.
+    :type layout_out: BIDSLayout
 
-    if (
-        not cfg.force
-        and report_name.exists()
-        and mask_name.exists()
-        and output_file.exists()
-    ):
+    :param img_path: Path to the functional image.
+    :type img_path: str
+
+    :return: Output files for the keys "report", "mask" and "no_label_bold".
+    :rtype: dict
+    """
+    return {
+        "report": create_bidsname(layout_out, filename=img_path, filetype="report"),
+        "mask": create_bidsname(layout_out, filename=img_path, filetype="mask"),
+        "no_label_bold": create_bidsname(layout_out, Path(img_path), "no_label_bold"),
+    }
+
+
+def output_exists(cfg: Config, outputs: dict[str, Path]) -> bool:
+    """Check if the output for a functional image exists and should not be overwritten.
+
+    :param cfg: Configuration object.
+    :type cfg: Config
+
+    :param outputs: Output files of the image as returned by output_filenames.
+    :type outputs: dict
+
+    :rtype: bool
+    """
+    if not cfg.force and all(file.exists() for file in outputs.values()):
         log.debug(
             "Output for the following file already exists. "
             "Use the '--force' option to overwrite. "
-            f"\n '{Path(img_path).name}'"
+            f"\n '{outputs['no_label_bold'].name}'"
         )
-        return
+        return True
 
-    log.info(f"Processing file: {Path(img_path).name}")
+    return False
 
-    coregister_and_extract_data(img_path, linear_coreg=cfg.linear_coreg)
+
+def collect_outputs(
+    layout_in: BIDSLayout,
+    layout_out: BIDSLayout,
+    img: BIDSFile,
+    outputs: dict[str, Path],
+    header_repetition_time: float | None = None,
+) -> None:
+    """Move the deepMReye outputs of a functional image to the output dataset.
+
+    :param layout_in: Layout input dataset.
+    :type layout_in: BIDSLayout
+
+    :param layout_out: Layout output dataset.
+    :type layout_out: BIDSLayout
+
+    :param img: Functional image that was coregistered.
+    :type img: BIDSFile
+
+    :param outputs: Output files of the image as returned by output_filenames.
+    :type outputs: dict
+
+    :param header_repetition_time: Repetition time read from the image header,
+                                   only used if missing from the image metadata.
+                                   Defaults to None.
+    :type header_repetition_time: float, optional
+    """
+    img_path = img.path
 
     deepmreye_mask_report = get_deepmreye_filename(
         layout_in, img=img_path, filetype="report"
     )
-    move_file(deepmreye_mask_report, report_name)
+    move_file(deepmreye_mask_report, outputs["report"])
 
     deepmreye_mask_name = get_deepmreye_filename(layout_in, img=img_path, filetype="mask")
-    move_file(deepmreye_mask_name, mask_name)
+    move_file(deepmreye_mask_name, outputs["mask"])
 
     source = str(Path(img_path).relative_to(layout_in.root))
-    save_sampling_frequency_to_json(layout_out, img=img, source=source)
+    save_sampling_frequency_to_json(
+        layout_out,
+        img=img,
+        source=source,
+        header_repetition_time=header_repetition_time,
+    )
 
-    combine_data_with_empty_labels(layout_out, mask_name)
-    file_to_move = Path(layout_out.root) / ".." / "bidsmreye" / output_file.name
-    move_file(file_to_move, output_file)
+    file_to_move = combine_data_with_empty_labels(layout_out, outputs["mask"])
+    move_file(file_to_move, outputs["no_label_bold"])
+
+
+@contextmanager
+def _single_threaded_workers() -> Iterator[None]:
+    """Limit the number of threads of the worker processes started in this context.
+
+    Thread pools are sized when the libraries are loaded,
+    so the environment variables must be set before the workers are started.
+    The environment of the main process is restored on exit.
+    """
+    previous = {name: os.environ.get(name) for name in THREAD_ENV_VARIABLES}
+    os.environ.update(dict.fromkeys(THREAD_ENV_VARIABLES, "1"))
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _init_worker() -> None:
+    """Load the deepMReye masks once for all the subjects of a worker process."""
+    _cached_masks()
+
+
+def _process_subject_in_worker(cfg: Config, subject_label: str) -> str:
+    """Run coregistration and extract data for one subject in a worker process.
+
+    Layouts cannot be pickled so they are recreated in the worker:
+    the input layout is loaded from the database saved by the main process.
+
+    :param cfg: Configuration object.
+    :type cfg: Config
+
+    :param subject_label:
+    :type subject_label: str
+
+    :return: Label of the processed subject.
+    :rtype: str
+    """
+    cfg.reset_database = False
+    layout_out = get_dataset_layout(cfg.output_dir)
+    process_subject(cfg, cfg.layout_in, layout_out, subject_label)
+    return subject_label
 
 
 def prepare_data(cfg: Config) -> None:
@@ -192,12 +372,7 @@ def prepare_data(cfg: Config) -> None:
     :param cfg: Configuration object
     :type cfg: Config
     """
-    layout_in = get_dataset_layout(
-        cfg.input_dir,
-        use_database=True,
-        config=["bids", "derivatives"],
-        reset_database=cfg.reset_database,
-    )
+    layout_in = cfg.layout_in
     check_layout(cfg, layout_in)
 
     layout_out = init_dataset(cfg)
@@ -212,9 +387,36 @@ def prepare_data(cfg: Config) -> None:
         subject_loop = progress.add_task(
             description="processing subject", total=len(subjects)
         )
-        for subject_label in subjects:
-            process_subject(cfg, layout_in, layout_out, subject_label)
-            generate_report(
-                output_dir=cfg.output_dir, subject_label=subject_label, action="prepare"
-            )
-            progress.update(subject_loop, advance=1)
+        if cfg.n_jobs == 1:
+            for subject_label in subjects:
+                process_subject(cfg, layout_in, layout_out, subject_label)
+                generate_report(
+                    output_dir=cfg.output_dir,
+                    subject_label=subject_label,
+                    action="prepare",
+                )
+                progress.update(subject_loop, advance=1)
+            return
+
+        # workers are spawned rather than forked
+        # so that they start with the environment set here
+        with (
+            _single_threaded_workers(),
+            ProcessPoolExecutor(
+                max_workers=cfg.n_jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            ) as executor,
+        ):
+            futures = [
+                executor.submit(_process_subject_in_worker, cfg, subject_label)
+                for subject_label in subjects
+            ]
+            for future in as_completed(futures):
+                subject_label = future.result()
+                generate_report(
+                    output_dir=cfg.output_dir,
+                    subject_label=subject_label,
+                    action="prepare",
+                )
+                progress.update(subject_loop, advance=1)
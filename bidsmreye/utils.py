@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import logging
 import re
 import shutil
+from functools import cache
 from pathlib import Path
 from typing import Any
 
@@ -28,6 +30,11 @@ log = bidsmreye_log(name="bidsmreye")
 
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 
+NIFTI_EXTENSION = re.compile(r"\.nii.*")
+
+LABEL = re.compile(r"[a-zA-Z0-9]+")
+EXTENSION = re.compile(r"\.?[a-zA-Z0-9]+(\.[a-zA-Z0-9]+)*")
+
 
 def progress_bar(text: str, color: str = "green") -> Progress:
     return Progress(
@@ -50,9 +57,8 @@ def copy_license(output_dir: Path) -> Path:
     input_file = str(TEMPLATES_DIR / "CCO")
     output_file = output_dir / "LICENSE"
     create_dir_if_absent(output_dir)
-    if not (output_dir / "LICENSE").is_file():
-        shutil.copy(input_file, output_dir)
-        move_file(output_dir / "CCO", output_file)
+    if not output_file.is_file():
+        shutil.copyfile(input_file, output_file)
     return output_file
 
 
@@ -83,6 +89,52 @@ def set_this_filter(
     return this_filter
 
 
+def literal_filter(this_filter: dict[str, Any]) -> dict[str, Any] | None:
+    """Return a copy of a filter where regular expressions are replaced by labels.
+
+    Values like the ones built by return_regex (``^label$`` or ``^label1$|^label2$``)
+    are turned back into a label or a list of labels,
+    so that the layout can be queried without ``regex_search``.
+    Empty values are dropped.
+    With ``regex_search``, an empty value only matches files that have this entity:
+    dropping it also matches files without this entity.
+
+    :param this_filter: Filter to use with ``regex_search=True``.
+    :type this_filter: dict
+
+    :return: Filter to use without ``regex_search``
+             or None if some values of the filter are actual regular expressions.
+    :rtype: Optional[dict]
+    """
+    literal: dict[str, Any] = {}
+    for key, value in this_filter.items():
+        if value is None:
+            literal[key] = value
+            continue
+        if value in ("", []):
+            continue
+        # run indices may be zero padded in the filenames
+        if key == "run":
+            return None
+
+        pattern = EXTENSION if key == "extension" else LABEL
+        labels = []
+        for x in value if isinstance(value, list) else [value]:
+            if not isinstance(x, str):
+                return None
+            for part in x.split("|"):
+                if part.startswith("^") != part.endswith("$"):
+                    return None
+                part = part.removeprefix("^").rstrip("$")
+                if not pattern.fullmatch(part):
+                    return None
+                labels.append(part)
+
+        literal[key] = labels if isinstance(value, list) or len(labels) > 1 else labels[0]
+
+    return literal
+
+
 def move_file(input: Path, output: Path) -> None:
     """Move or rename a file and create target directory if it does not exist.
 
@@ -97,10 +149,12 @@ def move_file(input: Path, output: Path) -> None:
     :param root: Optional. If specified, the printed path will be relative to this path.
     :type root: Path
     """
-    log.debug(f"{input.absolute()} --> {output.absolute()}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"{input.absolute()} --> {output.absolute()}")
     create_dir_for_file(output)
-    shutil.copy(input, output)
-    input.unlink()
+    # only copies the content when the source and target
+    # are on different file systems
+    shutil.move(input, output, copy_function=shutil.copyfile)
 
 
 def create_dir_if_absent(output_path: str | Path) -> None:
@@ -111,8 +165,9 @@ def create_dir_if_absent(output_path: str | Path) -> None:
     """
     if isinstance(output_path, str):
         output_path = Path(output_path)
-    if not output_path.is_dir():
-        log.debug(f"Creating dir: {output_path}")
+    if output_path.is_dir():
+        return
+    log.debug(f"Creating dir: {output_path}")
     output_path.mkdir(parents=True, exist_ok=True)
 
 
@@ -137,18 +192,25 @@ def return_regex(value: str | list[str] | None) -> str | None:
     :return:
     :rtype: Optional[str]
     """
+    if isinstance(value, list):
+        return _return_regex(tuple(value))
     if isinstance(value, str):
-        if value[0] != "^":
-            value = f"^{value}"
-        if not value.endswith("$"):
-            value = f"{value}$"
+        return _return_regex(value)
+    return value
+
+
+@cache
+def _return_regex(value: str | tuple[Any, ...]) -> str:
+    if isinstance(value, str):
+        return _anchor(value)
+    return "|".join(_anchor(x) if isinstance(x, str) else str(x) for x in value)
 
-    if isinstance(value, list):
-        new_value = ""
-        for i in value:
-            new_value = f"{new_value}{return_regex(i)}|"
-        value = new_value[:-1]
 
+def _anchor(value: str) -> str:
+    if not value.startswith("^"):
+        value = f"^{value}"
+    if not value.endswith("$"):
+        value = f"{value}$"
     return value
 
 
@@ -200,9 +262,9 @@ def return_deepmreye_output_filename(filename: str, filetype: str | None = None)
     if filetype is None:
         pass
     elif filetype == "mask":
-        filename = "mask_" + re.sub(r"\.nii.*", ".p", filename)
+        filename = "mask_" + NIFTI_EXTENSION.sub(".p", filename)
     elif filetype == "report":
-        filename = "report_" + re.sub(r"\.nii.*", ".html", filename)
+        filename = "report_" + NIFTI_EXTENSION.sub(".html", filename)
 
     return filename
 
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
@@ -39,6 +41,11 @@ COLORS = [COLOR_1, COLOR_2, COLOR_3]
 log = bidsmreye_log(name="bidsmreye")
 
 
+def _load_json(file: str) -> dict[str, Any]:
+    with open(file, "rb") as f:
+        return json.loads(f.read())
+
+
 def collect_group_qc_data(cfg: Config) -> pd.DataFrame | None:
     """Collect QC metrics data from all subjects json in a BIDS dataset.
 
@@ -60,23 +67,25 @@ def collect_group_qc_data(cfg: Config) -> pd.DataFrame | None:
 
     check_if_file_found(bf, this_filter, layout)
 
-    qc_data = None
-    for i, file in enumerate(bf):
-        log.info(f"Processing file: {file.path}")
-
-        entities = layout.parse_file_entities(file.path)
+    with ThreadPoolExecutor() as executor:
+        contents = list(executor.map(_load_json, [file.path for file in bf]))
 
-        with open(file.path) as f:
-            data = json.loads(f.read())
+    frames = []
+    for file, data in zip(bf, contents):
+        log.info(f"Processing file: {file.path}")
 
-        df = pd.json_normalize(data)
+        # only top level keys of the sidecars are used,
+        # so there is no need to flatten nested fields
+        df = pd.DataFrame([data])
         df["filename"] = Path(file.path).name
-        df["subject"] = entities["subject"]
-        qc_data = df if i == 0 else pd.concat([qc_data, df], sort=False)
+        df["subject"] = file.entities["subject"]
+        frames.append(df)
 
-    if qc_data is None:
+    if not frames:
         return None
 
+    qc_data = pd.concat(frames, ignore_index=True, sort=False)
+
     cols = [
         "subject",
         "filename",
@@ -322,6 +331,9 @@ def plot_time_series(
     if plotting_range is None:
         plotting_range = value_range(values_to_plot)
 
+    timestamps = eye_gaze_data["timestamp"].to_numpy()
+    values = values_to_plot.to_numpy()
+
     fig.add_trace(
         go.Scatter(
             x=time_range(eye_gaze_data["timestamp"]),
@@ -336,8 +348,8 @@ def plot_time_series(
 
     fig.add_trace(
         go.Scatter(
-            x=eye_gaze_data["timestamp"],
-            y=values_to_plot,
+            x=timestamps,
+            y=values,
             mode="lines",
             line_color=line_color,
             line_width=LINE_WIDTH,
@@ -347,10 +359,11 @@ def plot_time_series(
     )
 
     if outliers is not None:
+        mask = outliers.to_numpy() == 1
         fig.add_trace(
             go.Scatter(
-                x=eye_gaze_data["timestamp"][outliers == 1],
-                y=values_to_plot[outliers == 1],
+                x=timestamps[mask],
+                y=values[mask],
                 mode="markers",
                 marker_color=outlier_color,
                 marker_size=MARKER_SIZE,
@@ -434,14 +447,10 @@ def plot_heat_map(fig: Any, eye_gaze_data: pd.DataFrame) -> None:
         col=3,
     )
 
-    outliers = eye_gaze_data["x_outliers"]
-    outlier_color = "orange"
-    add_outliers_to_heatmap(fig, X, Y, outliers, outlier_color)
-    outliers = eye_gaze_data["y_outliers"]
-    add_outliers_to_heatmap(fig, X, Y, outliers, outlier_color)
-    outliers = eye_gaze_data["displacement_outliers"]
-    outlier_color = "red"
-    add_outliers_to_heatmap(fig, X, Y, outliers, outlier_color)
+    outliers = (eye_gaze_data[["x_outliers", "y_outliers"]].to_numpy() == 1).any(axis=1)
+    add_outliers_to_heatmap(fig, X, Y, outliers, outlier_color="orange")
+    outliers = eye_gaze_data["displacement_outliers"].to_numpy() == 1
+    add_outliers_to_heatmap(fig, X, Y, outliers, outlier_color="red")
 
     fig.update_xaxes(
         row=1,
@@ -464,12 +473,21 @@ def plot_heat_map(fig: Any, eye_gaze_data: pd.DataFrame) -> None:
 
 
 def add_outliers_to_heatmap(
-    fig: Any, X: pd.Series, Y: pd.Series, outliers: pd.Series, outlier_color: str
+    fig: Any,
+    X: pd.Series,
+    Y: pd.Series,
+    outliers: npt.NDArray[np.bool_],
+    outlier_color: str,
 ) -> None:
+    """Add all outliers of one type to the heatmap as a single trace.
+
+    :param outliers: Boolean mask of the outliers.
+    :type outliers: np.ndarray
+    """
     fig.add_trace(
         go.Scatter(
-            x=X[outliers == 1],
-            y=Y[outliers == 1],
+            x=X.to_numpy()[outliers],
+            y=Y.to_numpy()[outliers],
             mode="markers",
             marker_color=outlier_color,
             marker_size=MARKER_SIZE / 2,
@@ -4,12 +4,15 @@ import json
 import shutil
 from pathlib import Path
 
+import nibabel as nib
+import numpy as np
 import pytest
 
 from bidsmreye.bids_utils import (
     check_layout,
     create_bidsname,
     get_dataset_layout,
+    get_repetition_time,
     init_dataset,
     list_subjects,
 )
@@ -91,6 +94,68 @@ def test_save_sampling_frequency_to_json(data_dir, pybids_test_dataset):
     with open(sidecar_name) as f:
         content = json.load(f)
     assert content["Sources"][0] == "foo"
+    assert content["SamplingFrequency"] == 1 / 2.5
+
+
+def test_get_repetition_time(pybids_test_dataset):
+    img = (
+        pybids_test_dataset
+        / "sub-01"
+        / "ses-01"
+        / "func"
+        / "sub-01_ses-01_task-rest_space-T1w_desc-preproc_bold.nii.gz"
+    )
+    assert get_repetition_time(img) == 2.5
+
+
+def test_get_repetition_time_usec(tmp_path):
+    img = nib.Nifti1Image(np.zeros((2, 2, 2, 3), dtype=np.float32), np.eye(4))
+    img.header.set_zooms((1, 1, 1, 2_000_000))
+    img.header.set_xyzt_units("mm", "usec")
+    nib.save(img, tmp_path / "bold.nii.gz")
+    assert get_repetition_time(tmp_path / "bold.nii.gz") == 2.0
+
+
+def _bold_with_sidecar_repetition_time(tmp_path, pybids_test_dataset, repetition_time):
+    """Return a bold file whose sidecar and header repetition times (2.5) differ."""
+    input_dir = tmp_path / "fmriprep"
+    shutil.copytree(
+        pybids_test_dataset, input_dir, ignore=shutil.ignore_patterns("pybids_db")
+    )
+    with open(input_dir / "task-rest_bold.json", "w") as f:
+        json.dump({"TaskName": "Rest", "RepetitionTime": repetition_time}, f)
+
+    cfg = Config(input_dir, tmp_path / "output")
+    bf = cfg.layout_in.get(
+        subject="01",
+        session="01",
+        task="rest",
+        space="T1w",
+        suffix="bold",
+        extension=".nii.gz",
+    )
+    return cfg.layout_in, bf[0]
+
+
+def test_save_sampling_frequency_to_json_prefers_sidecar(tmp_path, pybids_test_dataset):
+    layout_in, img = _bold_with_sidecar_repetition_time(
+        tmp_path, pybids_test_dataset, repetition_time=2.0
+    )
+    assert get_repetition_time(img.path) == 2.5
+
+    save_sampling_frequency_to_json(layout_in, img, "foo", header_repetition_time=2.5)
+    sidecar_name = create_bidsname(layout_in, img.path, "no_label_json")
+    with open(sidecar_name) as f:
+        content = json.load(f)
+    assert content["SamplingFrequency"] == 1 / 2.0
+
+
+def test_save_sampling_frequency_to_json_error(tmp_path, pybids_test_dataset):
+    layout_in, img = _bold_with_sidecar_repetition_time(
+        tmp_path, pybids_test_dataset, repetition_time=0
+    )
+    with pytest.raises(ValueError, match="Invalid repetition time"):
+        save_sampling_frequency_to_json(layout_in, img, "foo")
 
 
 def test_check_layout_prepare_data(data_dir, pybids_test_dataset):
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import pickle
+
 import pytest
 
 from bidsmreye.configuration import (
@@ -18,6 +20,7 @@ def test_Config(data_dir, pybids_test_dataset):
     )
     assert not cfg.debug
     assert not cfg.linear_coreg
+    assert cfg.n_jobs == 1
     assert cfg.input_dir == pybids_test_dataset
     assert cfg.output_dir == data_dir / "bidsmreye"
     assert sorted(cfg.subjects) == ["01", "02", "03", "04", "05"]
@@ -104,3 +107,35 @@ def test_task_omit_missing_values(data_dir, pybids_test_dataset):
     assert cfg.subjects == ["01"]
     assert cfg.task == ["rest"]
     assert cfg.space == ["T1w"]
+
+
+def test_Config_layout_in(data_dir, pybids_test_dataset):
+    cfg = Config(
+        pybids_test_dataset,
+        data_dir,
+    )
+    assert cfg.layout_in is not None
+    assert "layout_in" not in config_to_dict(cfg)
+
+
+def test_Config_pickle_after_layout_in(data_dir, pybids_test_dataset):
+    cfg = Config(
+        pybids_test_dataset,
+        data_dir,
+        n_jobs=2,
+    )
+    assert cfg.layout_in is not None
+
+    unpickled = pickle.loads(pickle.dumps(cfg))
+
+    assert config_to_dict(unpickled) == config_to_dict(cfg)
+    assert unpickled.layout_in.root == cfg.layout_in.root
+
+
+def test_Config_n_jobs_error(data_dir, pybids_test_dataset):
+    with pytest.raises(ValueError):
+        Config(
+            pybids_test_dataset,
+            data_dir,
+            n_jobs=0,
+        )
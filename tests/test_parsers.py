@@ -20,6 +20,26 @@ def test_parser() -> None:
 
     assert args.task == ["foo", "bar"]
     assert args.linear_coreg
+    assert args.n_jobs == 1
+
+
+def test_parser_n_jobs() -> None:
+    parser = common_parser()
+    args, _ = parser.parse_known_args(
+        [
+            "/path/to/bids",
+            "/path/to/output",
+            "participant",
+            "all",
+            "--n_jobs",
+            "4",
+            "--n_jobs_per_subject",
+            "2",
+        ]
+    )
+
+    assert args.n_jobs == 4
+    assert args.n_jobs_per_subject == 2
 
 
 def test_parser_basic() -> None:
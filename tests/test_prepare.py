@@ -1,9 +1,29 @@
 from __future__ import annotations
 
+import os
+import pickle
+import shutil
+import threading
 from pathlib import Path
 
-from bidsmreye.bids_utils import create_bidsname, get_dataset_layout
-from bidsmreye.prepare_data import combine_data_with_empty_labels
+import numpy as np
+import pytest
+
+from bidsmreye import prepare_data
+from bidsmreye.bids_utils import create_bidsname, get_dataset_layout, init_dataset
+from bidsmreye.configuration import Config
+from bidsmreye.prepare_data import (
+    THREAD_ENV_VARIABLES,
+    _load_deepmreye_pickle,
+    _process_subject_in_worker,
+    _single_threaded_workers,
+    collect_outputs,
+    combine_data_with_empty_labels,
+    output_exists,
+    output_filenames,
+    process_subject,
+)
+from bidsmreye.utils import get_deepmreye_filename
 
 
 def test_combine_data_with_empty_labels(output_dir):
@@ -23,3 +43,156 @@ def test_combine_data_with_empty_labels(output_dir):
     output_file = create_bidsname(layout_out, file, "no_label_bold")
     file_to_move = Path(layout_out.root) / ".." / "bidsmreye" / output_file.name
     assert no_label_file == file_to_move
+
+
+def test_load_deepmreye_pickle(output_dir):
+    file = (
+        output_dir
+        / "sub-01"
+        / "func"
+        / "sub-01_task-nback_run-01_space-MNI152NLin2009cAsym_desc-eye_mask.p"
+    )
+
+    with open(file, "rb") as f:
+        expected = pickle.load(f)
+
+    data = _load_deepmreye_pickle(file)
+    np.testing.assert_array_equal(data, expected)
+
+
+def test_single_threaded_workers(monkeypatch):
+    monkeypatch.setenv("OMP_NUM_THREADS", "4")
+    monkeypatch.delenv("ITK_GLOBAL_DEFAULT_NUMBER_OF_THREADS", raising=False)
+
+    with _single_threaded_workers():
+        assert all(os.environ[name] == "1" for name in THREAD_ENV_VARIABLES)
+
+    assert os.environ["OMP_NUM_THREADS"] == "4"
+    assert "ITK_GLOBAL_DEFAULT_NUMBER_OF_THREADS" not in os.environ
+
+
+def test_process_subject_in_worker(monkeypatch, tmp_path, pybids_test_dataset):
+    cfg = Config(pybids_test_dataset, tmp_path, reset_database=True, n_jobs=2)
+
+    calls = []
+
+    def mock_process_subject(cfg, layout_in, layout_out, subject_label):
+        calls.append((cfg, layout_in, layout_out, subject_label))
+
+    monkeypatch.setattr(prepare_data, "process_subject", mock_process_subject)
+
+    assert _process_subject_in_worker(cfg, "01") == "01"
+
+    assert len(calls) == 1
+    worker_cfg, layout_in, layout_out, subject_label = calls[0]
+    assert not worker_cfg.reset_database
+    assert Path(layout_in.root) == pybids_test_dataset.absolute()
+    assert Path(layout_out.root) == cfg.output_dir.absolute()
+    assert subject_label == "01"
+
+
+def test_collect_outputs(tmp_path, data_dir, pybids_test_dataset):
+    input_dir = tmp_path / "fmriprep"
+    shutil.copytree(
+        pybids_test_dataset, input_dir, ignore=shutil.ignore_patterns("pybids_db")
+    )
+    cfg = Config(input_dir, tmp_path / "derivatives")
+    layout_in = cfg.layout_in
+    layout_out = init_dataset(cfg)
+
+    img = layout_in.get(
+        subject="01",
+        session="01",
+        task="rest",
+        space="T1w",
+        suffix="bold",
+        extension=".nii.gz",
+    )[0]
+
+    # outputs of deepMReye next to the input image
+    report = get_deepmreye_filename(layout_in, img=img.path, filetype="report")
+    report.write_text("<html></html>")
+    shutil.copyfile(
+        data_dir
+        / "bidsmreye"
+        / "sub-01"
+        / "func"
+        / "sub-01_task-nback_run-01_space-MNI152NLin2009cAsym_desc-eye_mask.p",
+        get_deepmreye_filename(layout_in, img=img.path, filetype="mask"),
+    )
+
+    outputs = output_filenames(layout_out, img.path)
+    assert not output_exists(cfg, outputs)
+
+    collect_outputs(layout_in, layout_out, img, outputs)
+
+    assert all(file.exists() for file in outputs.values())
+    assert not report.exists()
+    assert output_exists(cfg, outputs)
+
+    cfg.force = True
+    assert not output_exists(cfg, outputs)
+
+
+@pytest.fixture
+def mock_coregistration(monkeypatch):
+    """Record the images passed to the coregistration and collection steps."""
+    masks = ("eyemask_small", "eyemask_big", "template", None, 0, 0, 0)
+    calls = {"coregistered": [], "collected": []}
+
+    def mock_coregister_and_extract_data(img, linear_coreg=False, masks=None):
+        calls["coregistered"].append((img, masks))
+
+    def mock_collect_outputs(layout_in, layout_out, img, outputs, **kwargs):
+        calls["collected"].append(img.path)
+
+    monkeypatch.setattr(prepare_data, "_cached_masks", lambda: masks)
+    monkeypatch.setattr(
+        prepare_data, "coregister_and_extract_data", mock_coregister_and_extract_data
+    )
+    monkeypatch.setattr(prepare_data, "collect_outputs", mock_collect_outputs)
+
+    return masks, calls
+
+
+def test_process_subject_parallel(tmp_path, pybids_test_dataset, mock_coregistration):
+    masks, calls = mock_coregistration
+    cfg = Config(pybids_test_dataset, tmp_path, n_jobs_per_subject=2)
+    layout_out = get_dataset_layout(cfg.output_dir)
+
+    process_subject(cfg, cfg.layout_in, layout_out, "01")
+
+    assert len(calls["coregistered"]) > 1
+    assert all(x[1] is masks for x in calls["coregistered"])
+    assert sorted(calls["collected"]) == sorted(x[0] for x in calls["coregistered"])
+
+
+def test_process_subject_parallel_error(
+    monkeypatch, tmp_path, pybids_test_dataset, mock_coregistration
+):
+    _, calls = mock_coregistration
+    cfg = Config(pybids_test_dataset, tmp_path, n_jobs_per_subject=2)
+    layout_out = get_dataset_layout(cfg.output_dir)
+
+    never_set = threading.Event()
+    started = []
+
+    def mock_coregister_and_extract_data(img, linear_coreg=False, masks=None):
+        started.append(img)
+        if len(started) == 1:
+            raise RuntimeError("coregistration failed")
+        # keep the other workers busy while the pending images are cancelled
+        never_set.wait(timeout=0.5)
+
+    monkeypatch.setattr(
+        prepare_data, "coregister_and_extract_data", mock_coregister_and_extract_data
+    )
+
+    with pytest.raises(RuntimeError, match="coregistration failed"):
+        process_subject(cfg, cfg.layout_in, layout_out, "01")
+
+    images = cfg.layout_in.get(
+        subject="01", suffix="bold", desc="preproc", extension=".nii.gz"
+    )
+    assert len(started) < len(images)
+    assert not calls["collected"]
@@ -7,6 +7,7 @@ from bidsmreye.configuration import Config
 from bidsmreye.utils import (
     copy_license,
     get_deepmreye_filename,
+    literal_filter,
     return_deepmreye_output_filename,
     return_regex,
     set_this_filter,
@@ -69,6 +70,48 @@ def test_return_regex():
     assert return_regex("^foo") == "^foo$"
     assert return_regex("foo$") == "^foo$"
     assert return_regex(["foo", "bar"]) == "^foo$|^bar$"
+    assert return_regex(None) is None
+
+
+def test_literal_filter():
+    this_filter = {
+        "datatype": "func",
+        "desc": "preproc",
+        "extension": ["nii", "nii.gz"],
+        "subject": "01",
+        "suffix": "^bold$",
+        "task": "^nback$|^rest$",
+        "space": "",
+    }
+    assert literal_filter(this_filter) == {
+        "datatype": "func",
+        "desc": "preproc",
+        "extension": ["nii", "nii.gz"],
+        "subject": "01",
+        "suffix": "bold",
+        "task": ["nback", "rest"],
+    }
+
+    assert literal_filter({"suffix": "^eyetrack$$"}) == {"suffix": "eyetrack"}
+    assert literal_filter({"extension": "nii.*"}) is None
+    assert literal_filter({"desc": "^pre"}) is None
+    assert literal_filter({"run": "1|2"}) is None
+
+
+def test_literal_filter_same_files_as_regex(pybids_test_dataset, output_dir):
+    cfg = Config(
+        pybids_test_dataset,
+        output_dir,
+    )
+    layout = cfg.layout_in
+
+    this_filter = set_this_filter(cfg, subject_label="01", filter_type="bold")
+
+    expected = layout.get(regex_search=True, return_type="filename", **this_filter)
+    files = layout.get(return_type="filename", **literal_filter(this_filter))
+
+    assert expected
+    assert sorted(files) == sorted(expected)
 
 
 def test_set_this_filter_bold(pybids_test_dataset, output_dir):
@@ -86,7 +129,7 @@ def test_set_this_filter_bold(pybids_test_dataset, output_dir):
     assert this_filter == {
         "datatype": "func",
         "desc": "preproc",
-        "extension": "nii.*",
+        "extension": ["nii", "nii.gz"],
         "subject": "001",
         "suffix": "^bold$",
     }